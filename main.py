@@ -1,17 +1,48 @@
+import os
 import sys
 import aiohttp
 import asyncio
 import base64
+import random
 import configparser
-import requests
 import xmlrpc.client
 import logging
+from logging.handlers import RotatingFileHandler
+import orjson
 import argparse
-from tqdm.asyncio import tqdm_asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from tqdm import tqdm
 from io import BytesIO
 from PIL import Image
 
 
+def server_proxy(url, endpoint):
+    """server_proxy(url, endpoint)
+
+    Creates XML-RPC proxy for the Odoo endpoint.
+    The proxy keeps its HTTP connection open between calls and
+    returns binary values as bytes without extra wrapping.
+    url: url of the Odoo server(str)
+    endpoint: common or object(str)"""
+    return xmlrpc.client.ServerProxy(
+        "{}/xmlrpc/2/{}".format(url, endpoint), use_builtin_types=True
+    )
+
+
+def configure_logging(filename="UploadInformation.log"):
+    """configure_logging(filename='UploadInformation.log')
+
+    Configures logging into the file. Every run starts a new file, logs of the
+    five previous runs are kept in files like UploadInformation.log.1
+    filename: path(str)"""
+    handler = RotatingFileHandler(filename, backupCount=5, encoding="utf-8")
+    if os.path.exists(filename) and os.path.getsize(filename) > 0:
+        handler.doRollover()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s:%(message)s"))
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+
+
 def parameters(config_path):
     """parameter(config_path)
 
@@ -29,96 +60,304 @@ def parameters(config_path):
         "planet_url": config["Swapi"]["planet_url"],
         "character_url": config["Swapi"]["character_url"],
         "image_url": config["Swapi"]["image_url"],
+        "photo_cache": config["Swapi"].get("photo_cache", "photos.cache.json"),
     }
-    logging.basicConfig(
-        level=logging.INFO,
-        filename="UploadInformation.log",
-        filemode="w",
-        format="%(asctime)s %(levelname)s:%(message)s",
-    )
     try:
-        common = xmlrpc.client.ServerProxy("{}/xmlrpc/2/common".format(params["url"]))
+        common = server_proxy(params["url"], "common")
         uid = common.authenticate(
             params["db"], params["username"], params["password"], {}
         )
-        models = xmlrpc.client.ServerProxy("{}/xmlrpc/2/object".format(params["url"]))
+        models = server_proxy(params["url"], "object")
         return params, uid, models
     except xmlrpc.client.Fault:
         logging.info(
-            f'Database connection error. Incorrect database name. Current database name is "{params["db"]}"'
+            'Database connection error. Incorrect database name. Current database name is "%s"',
+            params["db"],
         )
         print("Ошибка подключения к БД. Неверное название БД.")
         sys.exit(1)
     except ConnectionRefusedError:
         logging.info(
-            f'Database connection error. Incorrect localhost. Current localhost is "{params["url"]}"'
+            'Database connection error. Incorrect localhost. Current localhost is "%s"',
+            params["url"],
         )
         print("Ошибка подключения к БД. Неверный localhost.")
         sys.exit(1)
 
 
-def generate_urls(base_url):
-    """generate_urls(base_url)
+def generate_urls(base_url, amount):
+    """generate_urls(base_url, amount)
 
-    Generates URL for future requests on the base of base_url
-    base_url: url(str)"""
-    amount = requests.get(base_url).json().get("count")
-    urls_to_request = [f"{base_url}{entity_id}" for entity_id in range(1, amount + 2)]
+    Generates URL of the remaining pages on the base of base_url.
+    The first page is already received, the API returns 10 entities per page.
+    base_url: url(str)
+    amount: number of the entities from the first page(int)"""
+    pages = -(-amount // 10)
+    urls_to_request = [f"{base_url}?page={page}" for page in range(2, pages + 1)]
     return urls_to_request
 
 
+def id_from_url(url):
+    """id_from_url(url)
+
+    Extracts entity id from the API URL like https://swapi.dev/api/planets/1/
+    url: url(str)"""
+    return int(url.rsplit("/", 2)[-2])
+
+
+class PhotoCache:
+    """Class stores received photos on disk with their ETag and Last-Modified headers"""
+
+    def __init__(self, path):
+        """PhotoCache(path)
+
+        Loads the cache from the file located in path.
+        path: path(str)"""
+        self.path = path
+        try:
+            with open(path, "rb") as file:
+                self.entries = orjson.loads(file.read())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            self.entries = {}
+
+    def headers(self, url):
+        """headers(url)
+
+        Returns headers for a conditional request of the cached photo.
+        url: URL for request(str)"""
+        entry = self.entries.get(url)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def get(self, url):
+        """get(url)
+
+        Returns the cached photo.
+        url: URL for request(str)"""
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        return base64.b64decode(entry["b64"])
+
+    def put(self, url, headers, body):
+        """put(url, headers, body)
+
+        Stores the photo if the server gave headers for conditional requests.
+        url: URL for request(str)
+        headers: response headers(dict)
+        body: photo(bytes)"""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if etag or last_modified:
+            self.entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "b64": base64.b64encode(body).decode("ascii"),
+            }
+
+    def save(self):
+        """save()
+
+        Writes the cache to the file."""
+        with open(self.path, "wb") as file:
+            file.write(orjson.dumps(self.entries))
+
+
 class Asynchron:
     """Class makes asynchronous requests to the API"""
 
+    def __init__(self, photo_cache=None):
+        """Asynchron(photo_cache=None)
+
+        photo_cache: PhotoCache() or None"""
+        self.photo_cache = photo_cache
+
+    async def with_retry(self, fetch, url, max_attempts=5, base=0.25):
+        """with_retry(fetch, url, max_attempts=5, base=0.25)
+
+        Calls fetch and repeats it with exponential backoff and jitter
+        on network errors. Returns None if all attempts failed.
+        fetch: coroutine function without arguments
+        url: URL for request(str)
+        max_attempts: max number of attempts(int)
+        base: initial delay between attempts in seconds(float)"""
+        for attempt in range(max_attempts):
+            try:
+                return await fetch()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == max_attempts - 1:
+                    break
+                logging.info(
+                    "Data acquisition error. Repeated attempt to receive data at %s",
+                    url,
+                )
+                await asyncio.sleep(
+                    min(base * 2**attempt, 10) * (0.5 + random.random())
+                )
+        logging.info(
+            "Data acquisition error. Failed to receive data at %s after %d attempts",
+            url,
+            max_attempts,
+        )
+        return None
+
     async def request_entity(self, session, url):
         """request_entity(session, url)
 
         Make requests on the given URL.
+        Server errors (5xx) are repeated, client errors (4xx) are returned as is.
         session: aiohttp.ClientSession()
         url: URL for request(str)"""
-        while True:
+
+        async def fetch():
+            async with session.get(url) as response:
+                if response.status >= 500:
+                    response.raise_for_status()
+                body = await response.read()
             try:
-                async with session.get(url) as response:
-                    return await response.json()
-            except Exception:
-                logging.info(
-                    f"Data acquisition error. Repeated attempt to receive data at {url}"
-                )
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                logging.info("Data acquisition error. Invalid JSON received at %s", url)
+                return None
+
+        return await self.with_retry(fetch, url)
 
     async def request_photo(self, session, url):
         """request_photo(session, url)
 
         Make requests on the given URL.
+        Server errors (5xx) are repeated, client errors (4xx) are returned as is.
+        If the photo cache is set, a conditional request is made and
+        the cached photo is returned when the server answers 304 Not Modified.
         session: aiohttp.ClientSession()
         url: URL for request(str)"""
-        while True:
-            try:
-                async with session.get(url) as response:
-                    return await response.read()
-            except Exception:
-                logging.info(
-                    f"Data acquisition error. Repeated attempt to receive data at {url}"
-                )
-
-    async def request_all(self, urls, type="", photo=False):
-        """request_all(urls, type='', photo=False)
+        headers = self.photo_cache.headers(url) if self.photo_cache else {}
+
+        async def fetch():
+            async with session.get(url, headers=headers) as response:
+                if response.status >= 500:
+                    response.raise_for_status()
+                if response.status == 304:
+                    return self.photo_cache.get(url)
+                body = await response.read()
+                if self.photo_cache is not None and response.status == 200:
+                    self.photo_cache.put(url, response.headers, body)
+                return body
+
+        return await self.with_retry(fetch, url) or b""
+
+    async def bounded(self, semaphore, coro):
+        """bounded(semaphore, coro)
+
+        Awaits the coroutine only when the semaphore allows it.
+        semaphore: asyncio.Semaphore()
+        coro: coroutine with the request"""
+        async with semaphore:
+            return await coro
+
+    async def completed(self, tasks, desc, step=50):
+        """completed(tasks, desc, step=50)
+
+        Yields results of the tasks in order of completion.
+        The progress bar is updated once per step results.
+        tasks: list of coroutines(list)
+        desc: description of the progress bar(str)
+        step: number of results per progress bar update(int)"""
+        with tqdm(total=len(tasks), desc=desc) as progress_bar:
+            done = 0
+            for coro in asyncio.as_completed(tasks):
+                yield await coro
+                done += 1
+                if done % step == 0:
+                    progress_bar.update(step)
+            progress_bar.update(done - progress_bar.n)
+
+    async def request_all(self, session, urls, type="", concurrency=32):
+        """request_all(session, urls, type='', concurrency=32)
 
         Make asynchronous requests on the given URL list.
+        session: aiohttp.ClientSession()
         urls: list of URLs for requests(list)
         type: type of the entity: planer or character(str)
-        photo: True or False (boolean)"""
-        async with aiohttp.ClientSession() as session:
-            if photo:
-                json_list = await tqdm_asyncio.gather(
-                    *[self.request_photo(session, url) for url in urls],
-                    desc="Получение информации об изображениях",
-                )
-            else:
-                json_list = await tqdm_asyncio.gather(
-                    *[self.request_entity(session, url) for url in urls],
-                    desc=f"Получение информации о {type}",
-                )
-            return json_list
+        concurrency: max number of simultaneous requests(int)"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def tagged(index, url):
+            return index, await self.bounded(
+                semaphore, self.request_entity(session, url)
+            )
+
+        tasks = [tagged(index, url) for index, url in enumerate(urls)]
+        json_list = [None] * len(tasks)
+        async for index, json in self.completed(
+            tasks, f"Получение информации о {type}"
+        ):
+            json_list[index] = json
+        return json_list
+
+    async def request_pages(self, session, base_url, type="", concurrency=32):
+        """request_pages(session, base_url, type='', concurrency=32)
+
+        Make asynchronous requests on all pages of the entity list.
+        The first page gives the number of entities, the remaining pages are requested simultaneously.
+        session: aiohttp.ClientSession()
+        base_url: url(str)
+        type: type of the entity: planer or character(str)
+        concurrency: max number of simultaneous requests(int)"""
+        first_page = await self.request_entity(session, f"{base_url}?page=1")
+        if not first_page:
+            return []
+        urls_to_request = generate_urls(base_url, first_page.get("count", 0))
+        pages = [first_page] + await self.request_all(
+            session, urls_to_request, type, concurrency
+        )
+        return [entity for page in pages if page for entity in page.get("results", [])]
+
+    async def request_photos(
+        self, session, urls, handler, executor=None, concurrency=32, chunk_size=64
+    ):
+        """request_photos(session, urls, handler, executor=None, concurrency=32, chunk_size=64)
+
+        Make asynchronous photo requests on the given URL list.
+        Received photos are collected in chunks, every chunk is passed to handler
+        in the executor while the remaining photos are still downloading,
+        so raw images are not kept in memory all together.
+        session: aiohttp.ClientSession()
+        urls: dict with character ids and URLs for requests(dict)
+        handler: function(photos) processing list of (character_id, response), returns dict
+        executor: concurrent.futures executor, default executor of the loop if None
+        concurrency: max number of simultaneous requests(int)
+        chunk_size: number of photos passed to handler at once(int)"""
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def tagged(character_id, url):
+            return character_id, await self.bounded(
+                semaphore, self.request_photo(session, url)
+            )
+
+        tasks = [tagged(character_id, url) for character_id, url in urls.items()]
+        futures = []
+        chunk = []
+        async for photo in self.completed(
+            tasks, "Получение информации об изображениях"
+        ):
+            chunk.append(photo)
+            if len(chunk) == chunk_size:
+                futures.append(loop.run_in_executor(executor, handler, chunk))
+                chunk = []
+        if chunk:
+            futures.append(loop.run_in_executor(executor, handler, chunk))
+        result = {}
+        for image_dict in await asyncio.gather(*futures):
+            result.update(image_dict)
+        return result
 
 
 class Planets:
@@ -128,13 +367,10 @@ class Planets:
         """generate_planet_info(json_list)
 
         Processes json list file.
-        json_list: list of dicts(list)"""
+        json_list: list of dicts with planets from the API pages(list)"""
         planet_dict = {}
-        for i in range(len(json_list)):
-            if "Not found" in json_list[i].values():
-                continue
-            planet_info = json_list[i]
-            planet_id = i + 1
+        for planet_info in json_list:
+            planet_id = id_from_url(planet_info["url"])
             name = planet_info.get("name", "")
             if name == "unknown":
                 continue
@@ -167,95 +403,116 @@ class Characters:
         """get_characters_info(json_list)
 
         Processes json list file.
-        json_list: list of dicts(list)"""
+        json_list: list of dicts with characters from the API pages(list)"""
         characters_dict = {}
         planet_id = ""
-        for i in range(len(json_list)):
-            if "Not found" in json_list[i].values():
-                continue
-            character_info = json_list[i]
-            character_id = i + 1
+        for character_info in json_list:
+            character_id = id_from_url(character_info["url"])
             name = character_info.get("name", "")
             if name == "unknown":
                 continue
             planet_url = character_info.get("homeworld", "")
             if planet_url != "":
-                planet_id = int(planet_url[(planet_url[:-1].rfind("/") + 1) : -1])
+                planet_id = id_from_url(planet_url)
             characters_dict.update({character_id: {"name": name, "planet": planet_id}})
         return characters_dict
 
-    def upgrage_character_photo(self, characters_dict, image_dict):
-        """upgrage_character_photo(characters_dict, image_dict)
+    def upgrade_characters(self, characters_dict, image_dict, ids_planets_dict):
+        """upgrade_characters(characters_dict, image_dict, ids_planets_dict)
 
-        Add image information to the characters dictionary.
-        characters_dict: dict with character info(dict)
-        image_dict: dict with image info(dict)"""
-        changed_characters_dict = {}
-        for characters_id, values in characters_dict.items():
-            if image_dict.get(characters_id) != "":
-                values.update({"image_1920": image_dict.get(characters_id)})
-            changed_characters_dict.update({characters_id: values})
-        return changed_characters_dict
-
-    def upgrade_characters(self, characters_dict, ids_planets_dict):
-        """upgrade_characters(characters_dict, ids_planets_dict)
-
-        Add planets odoo ids information to the characters dictionary.
+        Add image information and planets odoo ids to the characters dictionary in one pass.
         characters_dict: dict with character info(dict)
+        image_dict: dict with image info(dict)
         ids_planets_dict: dict with planets info(dict)"""
-        new_characters_dict = {}
-        for key, value in characters_dict.items():
-            planet_id = value.get("planet")
-            value.update({"planet": ids_planets_dict.get(planet_id, "")})
-            new_characters_dict.update({key: value})
-        return new_characters_dict
+        for character_id, value in characters_dict.items():
+            image = image_dict.get(character_id)
+            if image:
+                value["image_1920"] = image
+            value["planet"] = ids_planets_dict.get(value["planet"], "")
+        return characters_dict
 
 
 class CharactersImage:
     """Class generates urls for image requests and decode images"""
 
-    def generate_photo_urls(self, base_url, len):
-        """generate_photo_urls(base_url, len)
+    def generate_photo_urls(self, base_url, ids):
+        """generate_photo_urls(base_url, ids)
 
         Generates URL for future photo requests on the base of base_url
         base_url: url(str)
-        len: len of the character dict list(int)"""
-        urls_to_request = [
-            f"{base_url}{entity_id}.jpg" for entity_id in range(1, len + 1)
-        ]
+        ids: ids of the characters(iterable)"""
+        urls_to_request = {entity_id: f"{base_url}{entity_id}.jpg" for entity_id in ids}
         return urls_to_request
 
     def determine_response_type(self, response):
-        try:
-            image = Image.open(BytesIO(response))
+        # Определяем изображение по сигнатуре файла, иначе считаем, что это HTML
+        if response[:3] == b"\xff\xd8\xff" or response[:4] == b"\x89PNG":
             return "image"
-        except:
-            # В случае неудачи, предполагаем, что это HTML
-            return "html"
-
-    def upgrade_photo(self, image_info):
-        """upgrade_photo(image_info)
-
-        Processes decoding image
-        image_info: list with image information(list)"""
-        image_dict = {}
-        for i in range(len(image_info)):
-            character_id = i + 1
-            type = self.determine_response_type(image_info[i])
-            if type == "image":
-                image = base64.b64encode(image_info[i]).decode("ascii")
-            else:
-                image = ""
+        return "html"
+
+    def shrink_photo(self, response, max_size=1920, quality=85):
+        """shrink_photo(response, max_size=1920, quality=85)
+
+        Scales down the image larger than max_size and saves it as JPEG.
+        Smaller images are returned unchanged. Returns None if the image can not be decoded.
+        response: image information(bytes)
+        max_size: max width and height of the image in pixels(int)
+        quality: JPEG quality(int)"""
+        try:
+            with Image.open(BytesIO(response)) as image:
+                if image.width <= max_size and image.height <= max_size:
+                    return response
+                image.thumbnail((max_size, max_size))
+                buffer = BytesIO()
+                image.convert("RGB").save(
+                    buffer, "JPEG", quality=quality, optimize=True
+                )
+                return buffer.getvalue()
+        except (OSError, Image.DecompressionBombError):
+            return None
+
+    def encode_photo(self, response):
+        """encode_photo(response)
+
+        Processes decoding one image, returns empty string if response is not an image
+        response: image information(bytes)"""
+        if self.determine_response_type(response) == "image":
+            response = self.shrink_photo(response)
+            if response is not None:
+                return base64.b64encode(response).decode("ascii")
+        return ""
+
+    def log_missing_photos(self, image_dict):
+        """log_missing_photos(image_dict)
+
+        Logs characters which will be uploaded without image.
+        image_dict: dict with image info(dict)"""
+        for character_id, image in image_dict.items():
+            if not image:
                 logging.info(
-                    f"Image error. The character {character_id} will be uploaded without image."
+                    "Image error. The character %s will be uploaded without image.",
+                    character_id,
                 )
-            image_dict.update({character_id: image})
-        return image_dict
+
+
+def encode_photos(photos):
+    """encode_photos(photos)
+
+    Processes decoding a chunk of images in a worker process.
+    photos: list of (character_id, response)(list)"""
+    get_photo = CharactersImage()
+    return {
+        character_id: get_photo.encode_photo(response)
+        for character_id, response in photos
+    }
 
 
 class Odoo:
     """Class checks given entity list in the current database preventing duplication and load remaining info into Odoo database"""
 
+    def __init__(self):
+        self.local = threading.local()
+
     def check_entity_in_odoo(self, params, base_model, uid, models, entity_dict):
         """check_entity_in_odoo(params, base_model, uid, models, entity_dict)
 
@@ -265,6 +522,7 @@ class Odoo:
         uid: personal id
         models: object for work with Odoo models
         entity_dict: dict with entity info(dict)"""
+        names = [entity["name"] for entity in entity_dict.values()]
         try:
             result = models.execute_kw(
                 params["db"],
@@ -272,25 +530,20 @@ class Odoo:
                 params["password"],
                 base_model,
                 "search_read",
-                [[["name", "!=", ""]]],
-                {"fields": ["name"]},
+                [[["name", "in", names]]],
+                {"fields": ["id", "name"]},
             )
-            new_dict = {}
-            del_list = []
+            name_to_id = {row["name"]: row["id"] for row in result}
             ids_entity_dict = {}
-            for dict in result:
-                new_dict.update({dict["id"]: dict["name"]})
-            entity_in_odoo_keys = list(new_dict.keys())
-            entity_in_odoo_names = list(new_dict.values())
             for id_entity, entity in entity_dict.items():
-                try:
-                    index = entity_in_odoo_names.index(entity.get("name"))
-                    del_list.append(id_entity)
-                    ids_entity_dict.update({id_entity: entity_in_odoo_keys[index]})
-                except ValueError:
-                    continue
-            for entity in del_list:
-                del entity_dict[entity]
+                name = entity.get("name")
+                if name in name_to_id:
+                    ids_entity_dict[id_entity] = name_to_id[name]
+            entity_dict = {
+                id_entity: entity
+                for id_entity, entity in entity_dict.items()
+                if id_entity not in ids_entity_dict
+            }
             return entity_dict, ids_entity_dict
         except xmlrpc.client.Fault:
             print(
@@ -298,100 +551,180 @@ class Odoo:
             )
             sys.exit(1)
 
+    def create_entities(self, params, base_model, uid, values):
+        """create_entities(params, base_model, uid, values)
+
+        Creates a chunk of entities in Odoo from a worker thread.
+        ServerProxy is not thread-safe, so every thread uses its own one.
+        params: dict with parameters(dict)
+        base_model: entity model in the Odoo(str)
+        uid: personal id
+        values: list of dicts with entity info(list)"""
+        models = getattr(self.local, "models", None)
+        if models is None:
+            models = server_proxy(params["url"], "object")
+            self.local.models = models
+        return models.execute_kw(
+            params["db"], uid, params["password"], base_model, "create", [values]
+        )
+
+    def log_created(self, type, entity_dict, keys, entity_odoo_id, ids_entity_dict):
+        """log_created(type, entity_dict, keys, entity_odoo_id, ids_entity_dict)
+
+        Saves Odoo ids of the created entities and logs them.
+        type: planet or character(str)
+        entity_dict: dict with entity info(dict)
+        keys: entity ids in the API(list)
+        entity_odoo_id: entity ids in the Odoo database in the same order(list)
+        ids_entity_dict: dict with entity ids in the API and in the Odoo(dict)"""
+        ids_entity_dict.update(zip(keys, entity_odoo_id))
+        for id_entity in keys:
+            logging.info(
+                "The entity type: %s, name: %s, Odoo_id: %s, mother_id: %s is created",
+                type,
+                entity_dict[id_entity]["name"],
+                ids_entity_dict[id_entity],
+                id_entity,
+            )
+
     def upload_entity_info_into_oddo(
-        self, params, base_model, uid, models, entity_dict, ids_entity_dict, type
+        self,
+        params,
+        base_model,
+        uid,
+        models,
+        entity_dict,
+        ids_entity_dict,
+        type,
+        chunk_size=200,
+        workers=4,
     ):
-        """upload_entity_info_into_oddo(params, base_model, uid, models, entity_dict, ids_entity_dict, type)
+        """upload_entity_info_into_oddo(params, base_model, uid, models, entity_dict, ids_entity_dict, type, chunk_size=200, workers=4)
 
         Upload entity list into Odoo.
+        Entities are sent in chunks of chunk_size, several chunks are sent simultaneously.
         params: dict with parameters(dict)
         base_model: entity model in the Odoo(str)
         uid: personal id
         models: object for work with Odoo models
         entity_dict: dict with entity info(dict)
         ids_entity_dict: dict with entity ids in  the API and in the Odoo database(dict)
-        type: planet or character(str)"""
-        entity_odoo_id = models.execute_kw(
-            params["db"],
-            uid,
-            params["password"],
-            base_model,
-            "create",
-            [list(entity_dict.values())],
-        )
-        ids_entity_dict.update(dict(zip(entity_dict.keys(), entity_odoo_id)))
-        for id_entity, value in entity_dict.items():
-            logging.info(
-                f'The entity type: {type}, name: {value["name"]}, Odoo_id: {ids_entity_dict[id_entity]}, mother_id: {id_entity} is created'
+        type: planet or character(str)
+        chunk_size: max number of entities in one request(int)
+        workers: max number of simultaneous requests(int)"""
+        keys = list(entity_dict.keys())
+        values = list(entity_dict.values())
+        key_chunks = [keys[i : i + chunk_size] for i in range(0, len(keys), chunk_size)]
+        chunks = [values[i : i + chunk_size] for i in range(0, len(values), chunk_size)]
+        if len(chunks) == 1:
+            entity_odoo_id = models.execute_kw(
+                params["db"], uid, params["password"], base_model, "create", chunks
             )
+            self.log_created(type, entity_dict, keys, entity_odoo_id, ids_entity_dict)
+            return ids_entity_dict
+        errors = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self.create_entities, params, base_model, uid, chunk)
+                for chunk in chunks
+            ]
+            # Чанки создаются независимо: фиксируем успешные, даже если другие упали
+            for key_chunk, future in zip(key_chunks, futures):
+                try:
+                    entity_odoo_id = future.result()
+                except (xmlrpc.client.Error, OSError) as error:
+                    logging.info(
+                        "Upload error. The entities type: %s, mother_ids: %s are not created: %s",
+                        type,
+                        key_chunk,
+                        error,
+                    )
+                    errors.append(error)
+                    continue
+                self.log_created(
+                    type, entity_dict, key_chunk, entity_odoo_id, ids_entity_dict
+                )
+        if errors:
+            raise errors[0]
         return ids_entity_dict
 
 
-if __name__ == "__main__":
-    # Задание файла конфигураций через командную строку
-    parser = argparse.ArgumentParser()
-    parser.add_argument("config", help="path to the configuration file")
-    args = parser.parse_args()
-    config_path = args.config
+def create_session():
+    """create_session()
 
-    # Получение параметров программы
-    params, uid, models = parameters(config_path)
+    Creates one aiohttp session shared by all requests to the API,
+    so keep-alive connections are reused between planets, characters and photos."""
+    connector = aiohttp.TCPConnector(
+        limit=100, limit_per_host=32, ttl_dns_cache=300, keepalive_timeout=60
+    )
+    return aiohttp.ClientSession(connector=connector)
 
-    # Экземляр класса асинхрона
-    asynchron = Asynchron()
 
-    # Генерация url для планет
-    urls_to_request = generate_urls(params.get("planet_url"))
+async def main(params, uid, models):
+    """main(params, uid, models)
 
-    # Получаем данные о планетах с API
-    json_planets = asyncio.run(asynchron.request_all(urls_to_request, "планетах"))
-    planet = Planets()
-    planet_dict = planet.generate_planet_info(json_planets)
+    Loads planets and characters from the API into Odoo.
+    params: dict with parameters(dict)
+    uid: personal id
+    models: object for work with Odoo models"""
+    # Экземляр класса асинхрона с кэшем фотографий
+    photo_cache = PhotoCache(params["photo_cache"])
+    asynchron = Asynchron(photo_cache)
 
-    # Загружаем планеты в Odoo
-    odoo = Odoo()
-    planet_dict, ids_planets_dict = odoo.check_entity_in_odoo(
-        params, params["planets_model"], uid, models, planet_dict
-    )
-    ids_planets_dict = odoo.upload_entity_info_into_oddo(
-        params,
-        params["planets_model"],
-        uid,
-        models,
-        planet_dict,
-        ids_planets_dict,
-        "planet",
-    )
-    print("Планеты загружены в Odoo")
+    async with create_session() as session:
+        # Получаем данные о планетах с API
+        json_planets = await asynchron.request_pages(
+            session, params.get("planet_url"), "планетах"
+        )
+        planet = Planets()
+        planet_dict = planet.generate_planet_info(json_planets)
 
-    # Генерация url для героев
-    urls_to_request = generate_urls(params.get("character_url"))
+        # Загружаем планеты в Odoo
+        odoo = Odoo()
+        planet_dict, ids_planets_dict = odoo.check_entity_in_odoo(
+            params, params["planets_model"], uid, models, planet_dict
+        )
+        ids_planets_dict = odoo.upload_entity_info_into_oddo(
+            params,
+            params["planets_model"],
+            uid,
+            models,
+            planet_dict,
+            ids_planets_dict,
+            "planet",
+        )
+        print("Планеты загружены в Odoo")
 
-    # Получаем данные о героях с API
-    json_characters = asyncio.run(asynchron.request_all(urls_to_request, "героях"))
-    character = Characters()
-    characters_dict = character.get_characters_info(json_characters)
+        # Получаем данные о героях с API
+        json_characters = await asynchron.request_pages(
+            session, params.get("character_url"), "героях"
+        )
+        character = Characters()
+        characters_dict = character.get_characters_info(json_characters)
 
-    # Получаем фотографии героев
-    get_photo = CharactersImage()
-    urls_to_request = get_photo.generate_photo_urls(
-        params.get("image_url"), len(characters_dict) + 1
-    )
-    photo_characters = asyncio.run(asynchron.request_all(urls_to_request, photo=True))
-    image_dict = get_photo.upgrade_photo(photo_characters)
+        # Убираем героев, которые уже есть в Odoo
+        characters_dict, ids_character_dict = odoo.check_entity_in_odoo(
+            params, params["characters_model"], uid, models, characters_dict
+        )
 
-    # Добавляем фото к героям
-    changed_characters_dict = character.upgrage_character_photo(
-        characters_dict, image_dict
-    )
+        # Получаем фотографии только новых героев
+        get_photo = CharactersImage()
+        urls_to_request = get_photo.generate_photo_urls(
+            params.get("image_url"), characters_dict.keys()
+        )
+        with ProcessPoolExecutor() as executor:
+            image_dict = await asynchron.request_photos(
+                session, urls_to_request, encode_photos, executor
+            )
+        get_photo.log_missing_photos(image_dict)
+        photo_cache.save()
 
-    # Загружаем героев в Odoo
-    characters_dict, ids_character_dict = odoo.check_entity_in_odoo(
-        params, params["characters_model"], uid, models, changed_characters_dict
-    )
+    # Добавляем фото и id планет к героям
     new_characters_dict = character.upgrade_characters(
-        characters_dict, ids_planets_dict
+        characters_dict, image_dict, ids_planets_dict
     )
+
+    # Загружаем героев в Odoo
     ids_character_dict = odoo.upload_entity_info_into_oddo(
         params,
         params["characters_model"],
@@ -402,3 +735,19 @@ if __name__ == "__main__":
         "character",
     )
     print("Герои загружены в Odoo")
+
+
+if __name__ == "__main__":
+    # Задание файла конфигураций через командную строку
+    parser = argparse.ArgumentParser()
+    parser.add_argument("config", help="path to the configuration file")
+    args = parser.parse_args()
+    config_path = args.config
+
+    # Настройка логирования
+    configure_logging()
+
+    # Получение параметров программы
+    params, uid, models = parameters(config_path)
+
+    asyncio.run(main(params, uid, models))